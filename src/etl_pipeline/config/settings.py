@@ -5,61 +5,243 @@ This module handles loading and managing configuration settings for the ETL pipe
 It supports loading from environment variables and configuration files.
 """
 
+import functools
 import os
+import types
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Try to import pyarrow, which the Parquet and Feather writers need
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
-def load_config():
+# Output formats the report generator can write tabular reports in
+REPORT_FORMATS = ('csv', 'parquet', 'feather')
+
+# Report formats that can only be written when pyarrow is installed
+PYARROW_REPORT_FORMATS = ('parquet', 'feather')
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Database connection settings."""
+    
+    type: str
+    db_path: str = None
+    strict_durability: bool = False
+    host: str = None
+    port: int = None
+    database: str = None
+    user: str = None
+    password: str = None
+    
+    def to_dict(self):
+        """
+        Convert the settings to the dictionary format used by the database utilities.
+        
+        Returns:
+            dict: Database configuration with only the keys relevant to its type
+        """
+        if self.type == 'sqlite':
+            return {'type': self.type, 'db_path': self.db_path, 'strict_durability': self.strict_durability}
+        
+        return {
+            'type': self.type,
+            'host': self.host,
+            'port': self.port,
+            'database': self.database,
+            'user': self.user,
+            'password': self.password
+        }
+
+
+@dataclass(frozen=True)
+class LoggingSettings:
+    """Logging settings."""
+    
+    level: str
+    file: str
+    format: str
+    
+    def to_dict(self):
+        """
+        Convert the settings to the dictionary format used by setup_logging.
+        
+        Returns:
+            dict: Logging configuration
+        """
+        return {'level': self.level, 'file': self.file, 'format': self.format}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable configuration settings for the ETL pipeline."""
+    
+    csv_path: str
+    csv_chunksize: int
+    bulk_load: bool
+    load_workers: int
+    reports_dir: str
+    report_formats: tuple
+    database: DatabaseSettings
+    logging: LoggingSettings
+    exchange_rate_api_url: str
+    exchange_rate_cache_path: str
+    exchange_rate_cache_ttl: int
+    exchange_rate_fallback: types.MappingProxyType = field(default_factory=lambda: types.MappingProxyType({}))
+    
+    def to_dict(self):
+        """
+        Convert the settings to a configuration dictionary.
+        
+        Returns:
+            dict: A new dictionary containing all configuration settings
+        """
+        return {
+            'csv_path': self.csv_path,
+            'csv_chunksize': self.csv_chunksize,
+            'bulk_load': self.bulk_load,
+            'load_workers': self.load_workers,
+            'reports_dir': self.reports_dir,
+            'report_formats': self.report_formats,
+            'database': self.database.to_dict(),
+            'logging': self.logging.to_dict(),
+            'exchange_rate_api_url': self.exchange_rate_api_url,
+            'exchange_rate_cache_path': self.exchange_rate_cache_path,
+            'exchange_rate_cache_ttl': self.exchange_rate_cache_ttl,
+            'exchange_rate_fallback': dict(self.exchange_rate_fallback)
+        }
+
+
+def _getenv_int(name, default):
     """
-    Load configuration settings from environment variables and/or config files.
+    Read an integer environment variable.
+    
+    Args:
+        name (str): Name of the environment variable
+        default (str): Value to use when the variable is not set
     
     Returns:
-        dict: A dictionary containing all configuration settings
+        int: The parsed value
+    
+    Raises:
+        ValueError: If the variable is not a valid integer
+    """
+    value = os.getenv(name, default)
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid integer for {name}: {value!r}") from None
+
+
+def _getenv_formats(name, default):
+    """
+    Read a comma-separated list of report output formats.
+    
+    Args:
+        name (str): Name of the environment variable
+        default (str): Value to use when the variable is not set
+    
+    Returns:
+        tuple: The requested formats in lowercase
+    
+    Raises:
+        ValueError: If a format is not supported or needs pyarrow, which is not installed
+    """
+    formats = tuple(f.strip().lower() for f in os.getenv(name, default).split(',') if f.strip())
+    unsupported = [f for f in formats if f not in REPORT_FORMATS]
+    if unsupported:
+        raise ValueError(f"Unsupported report format(s) in {name}: {', '.join(unsupported)}")
+    if not PYARROW_AVAILABLE:
+        needs_pyarrow = [f for f in formats if f in PYARROW_REPORT_FORMATS]
+        if needs_pyarrow:
+            raise ValueError(f"Report format(s) in {name} require pyarrow, which is not installed: {', '.join(needs_pyarrow)}")
+    return formats
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings():
+    """
+    Load and validate configuration settings from environment variables and/or config files.
+    
+    The settings are built and validated once; later calls return the same
+    immutable object, which can be shared freely between threads.
+    Call get_settings.cache_clear() to pick up changed environment variables.
+    
+    Returns:
+        Settings: The configuration settings
+    
+    Raises:
+        ValueError: If the database type is unsupported or a numeric setting is invalid
     """
     # Load environment variables from .env file
     load_dotenv()
     
     # Database configuration
-    db_type = os.getenv('DB_TYPE', 'sqlite')
+    db_type = os.getenv('DB_TYPE', 'sqlite').lower()
     
     # Configure database based on type
-    if db_type.lower() == 'sqlite':
-        db_config = {
-            'type': 'sqlite',
-            'db_path': os.getenv('SQLITE_DB_PATH', '../sales_database.sqlite')
-        }
-    elif db_type.lower() == 'postgresql':
-        db_config = {
-            'type': 'postgresql',
-            'host': os.getenv('PG_HOST', 'localhost'),
-            'port': int(os.getenv('PG_PORT', '5432')),
-            'database': os.getenv('PG_DATABASE', 'sales'),
-            'user': os.getenv('PG_USER', 'postgres'),
-            'password': os.getenv('PG_PASSWORD', 'password')
-        }
+    if db_type == 'sqlite':
+        database = DatabaseSettings(
+            type='sqlite',
+            db_path=os.getenv('SQLITE_DB_PATH', '../sales_database.sqlite'),
+            strict_durability=os.getenv('SQLITE_STRICT_DURABILITY', 'false').lower() == 'true'
+        )
+    elif db_type == 'postgresql':
+        database = DatabaseSettings(
+            type='postgresql',
+            host=os.getenv('PG_HOST', 'localhost'),
+            port=_getenv_int('PG_PORT', '5432'),
+            database=os.getenv('PG_DATABASE', 'sales'),
+            user=os.getenv('PG_USER', 'postgres'),
+            password=os.getenv('PG_PASSWORD', 'password')
+        )
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
     
     # Logging configuration
-    logging_config = {
-        'level': os.getenv('LOG_LEVEL', 'INFO'),
-        'file': os.getenv('LOG_FILE', '../etl_process.log'),
-        'format': os.getenv('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    }
-    
-    # Build complete configuration
-    config = {
-        'csv_path': os.getenv('CSV_PATH', '../sales_data.csv'),
-        'reports_dir': os.getenv('REPORTS_DIR', '../reports'),
-        'database': db_config,
-        'logging': logging_config,
-        'exchange_rate_api_url': os.getenv('EXCHANGE_RATE_API_URL', 'https://api.exchangerate-api.com/v4/latest/USD'),
-        'exchange_rate_fallback': {
+    logging_settings = LoggingSettings(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        file=os.getenv('LOG_FILE', '../etl_process.log'),
+        format=os.getenv('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    
+    reports_dir = os.getenv('REPORTS_DIR', '../reports')
+    
+    return Settings(
+        csv_path=os.getenv('CSV_PATH', '../sales_data.csv'),
+        csv_chunksize=_getenv_int('CSV_CHUNKSIZE', '0') or None,
+        bulk_load=os.getenv('BULK_LOAD', 'false').lower() == 'true',
+        load_workers=_getenv_int('LOAD_WORKERS', '4'),
+        reports_dir=reports_dir,
+        report_formats=_getenv_formats('REPORT_FORMATS', 'csv'),
+        database=database,
+        logging=logging_settings,
+        exchange_rate_api_url=os.getenv('EXCHANGE_RATE_API_URL', 'https://api.exchangerate-api.com/v4/latest/USD'),
+        exchange_rate_cache_path=os.getenv('EXCHANGE_RATE_CACHE_PATH', str(Path(reports_dir) / '.fx_cache.json')),
+        exchange_rate_cache_ttl=_getenv_int('EXCHANGE_RATE_CACHE_TTL', '21600'),
+        # Read-only view so the shared settings object cannot be changed by callers
+        exchange_rate_fallback=types.MappingProxyType({
             'USD': 1.0,
             'EUR': 0.91,
             'GBP': 0.78
-        }
-    }
+        })
+    )
+
+
+def load_config():
+    """
+    Load configuration settings as a dictionary.
+    
+    The values come from the cached settings returned by get_settings(), so
+    environment variables are only read once. Each call returns a new
+    dictionary that the caller is free to modify.
     
-    return config
+    Returns:
+        dict: A dictionary containing all configuration settings
+    """
+    return get_settings().to_dict()
@@ -5,43 +5,81 @@ This module provides functionality to extract data from CSV files.
 """
 
 import logging
+import os
+import numpy as np
 import pandas as pd
-from pathlib import Path
+
+# Try to import pyarrow for multithreaded CSV parsing
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 logger = logging.getLogger('etl_pipeline.extractors.csv')
 
+# Layout of the sales export: the columns to read, their dtypes and the date columns.
+# Text columns stay as plain objects because the transformer fills them with new values,
+# and order_id is a nullable integer so that a blank id does not fail the whole read.
+SALES_CSV_SCHEMA = {
+    'cols': ['order_id', 'affiliate_name', 'sales_amount', 'currency', 'order_date', 'category'],
+    'dtypes': {
+        'order_id': 'Int32',
+        'affiliate_name': 'object',
+        'currency': 'object',
+        'category': 'object'
+    },
+    'dates': ['order_date']
+}
+
 
 class CsvExtractor:
     """Class for extracting data from CSV files."""
     
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, chunksize=None, schema=None):
         """
         Initialize with the path to the CSV file.
         
         Args:
             csv_path (str): Path to the CSV file
+            chunksize (int, optional): Number of rows per chunk when streaming the file
+            schema (dict, optional): CSV layout with 'cols', 'dtypes' and 'dates' keys,
+                see SALES_CSV_SCHEMA. Types are inferred by pandas when omitted.
         """
         self.csv_path = csv_path
+        self.chunksize = chunksize
+        self.schema = schema
     
     def extract(self):
         """
         Extract data from the CSV file.
         
         Returns:
-            pandas.DataFrame: DataFrame containing the CSV data
+            pandas.DataFrame: DataFrame containing the CSV data, or an iterator of
+                DataFrames with at most chunksize rows each when chunksize is set
         
         Raises:
             FileNotFoundError: If the CSV file does not exist
             Exception: For other errors during extraction
         """
         try:
-            # Ensure the file exists
-            file_path = Path(self.csv_path)
-            if not file_path.exists():
-                raise FileNotFoundError(f"CSV file not found at {self.csv_path}")
+            # Ensure the file exists and record its size with a single stat call
+            try:
+                file_size = os.stat(self.csv_path).st_size
+            except FileNotFoundError:
+                raise FileNotFoundError(f"CSV file not found at {self.csv_path}") from None
+            logger.info(f"CSV file {self.csv_path} is {file_size} bytes")
+            
+            if self.chunksize:
+                logger.info(f"Streaming data from {self.csv_path} in chunks of {self.chunksize} rows")
+                return pd.read_csv(self.csv_path, chunksize=self.chunksize, **self._read_options())
             
             logger.info(f"Extracting data from {self.csv_path}")
-            df = pd.read_csv(self.csv_path)
+            if PYARROW_AVAILABLE:
+                df = self._read_with_pyarrow()
+            else:
+                df = pd.read_csv(self.csv_path, **self._read_options())
             logger.info(f"Successfully extracted {len(df)} records from CSV")
             return df
         
@@ -52,3 +90,69 @@ class CsvExtractor:
         except Exception as e:
             logger.error(f"Error extracting CSV data: {str(e)}")
             raise
+    
+    def _read_options(self):
+        """
+        Build the pandas.read_csv keyword arguments for the configured schema.
+        
+        Returns:
+            dict: Keyword arguments for pandas.read_csv
+        """
+        if not self.schema:
+            return {}
+        
+        options = {'engine': 'c', 'low_memory': False}
+        if self.schema.get('cols'):
+            options['usecols'] = self.schema['cols']
+        if self.schema.get('dtypes'):
+            options['dtype'] = self.schema['dtypes']
+        if self.schema.get('dates'):
+            options['parse_dates'] = self.schema['dates']
+        return options
+    
+    def _read_with_pyarrow(self):
+        """
+        Read the whole CSV file with the multithreaded pyarrow parser.
+        
+        Date columns are left to pyarrow's type inference so that malformed
+        values reach the transformer instead of failing the read; columns
+        inferred as dates are returned as datetime64 like parse_dates does.
+        Columns whose requested dtype is not a plain numpy number, such as
+        'object', 'category' or 'Int32', are parsed as strings or as their
+        numpy type and converted afterwards, so both readers return the requested dtypes.
+        
+        Returns:
+            pandas.DataFrame: DataFrame containing the CSV data
+        """
+        read_options = pacsv.ReadOptions(block_size=64 << 20, use_threads=True)
+        convert_options = {'strings_can_be_null': True}
+        converted_dtypes = {}
+        
+        if self.schema:
+            if self.schema.get('cols'):
+                convert_options['include_columns'] = self.schema['cols']
+            column_types = {}
+            for column, dtype in (self.schema.get('dtypes') or {}).items():
+                pandas_dtype = pd.api.types.pandas_dtype(dtype)
+                if isinstance(pandas_dtype, np.dtype) and pandas_dtype != np.dtype(object):
+                    column_types[column] = pa.from_numpy_dtype(pandas_dtype)
+                    continue
+                
+                converted_dtypes[column] = pandas_dtype
+                if pd.api.types.is_numeric_dtype(pandas_dtype):
+                    # Nullable numbers such as 'Int32' are parsed as their numpy type
+                    column_types[column] = pa.from_numpy_dtype(pandas_dtype.numpy_dtype)
+                else:
+                    # Objects, strings and categoricals are parsed as text
+                    column_types[column] = pa.string()
+            convert_options['column_types'] = column_types
+        
+        table = pacsv.read_csv(
+            self.csv_path,
+            read_options=read_options,
+            convert_options=pacsv.ConvertOptions(**convert_options)
+        )
+        df = table.to_pandas(date_as_object=False)
+        if converted_dtypes:
+            df = df.astype(converted_dtypes)
+        return df
@@ -4,59 +4,155 @@ Exchange Rate Extractor Module
 This module provides functionality to extract exchange rate data from an API.
 """
 
+import json
 import logging
+import os
+import tempfile
+import time
+from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from etl_pipeline.config.settings import load_config
 
 logger = logging.getLogger('etl_pipeline.extractors.exchange_rate')
 
+# Shared HTTP session so repeated requests reuse pooled keep-alive connections
+# and transient gateway errors are retried with backoff
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+_session = requests.Session()
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
 
 class ExchangeRateExtractor:
     """Class for extracting exchange rate data from an API."""
     
-    def __init__(self, api_url=None, fallback_rates=None):
+    def __init__(self, api_url=None, fallback_rates=None, cache_path=None, cache_ttl=None):
         """
         Initialize with API URL and fallback rates.
         
         Args:
             api_url (str, optional): URL of the exchange rate API
             fallback_rates (dict, optional): Fallback exchange rates to use if API fails
+            cache_path (str, optional): Path of the JSON file used to cache fetched rates
+            cache_ttl (int, optional): Number of seconds cached rates stay valid (0 disables the cache)
         """
-        config = load_config()
+        # Only read the configuration when the caller left something to default,
+        # including the cache settings, so explicit API arguments keep the disk cache
+        explicit = api_url and fallback_rates and cache_path and cache_ttl is not None
+        config = {} if explicit else load_config()
         self.api_url = api_url or config.get('exchange_rate_api_url')
         self.fallback_rates = fallback_rates or config.get('exchange_rate_fallback')
+        self.cache_path = cache_path or config.get('exchange_rate_cache_path')
+        self.cache_ttl = cache_ttl if cache_ttl is not None else config.get('exchange_rate_cache_ttl', 0)
     
     def extract(self):
         """
         Extract exchange rate data from the API.
         
+        Cached rates are returned without contacting the API while they are
+        younger than the configured TTL.
+        
         Returns:
             dict: Dictionary of currency codes to exchange rates
         """
+        cached = self._read_cache()
+        if cached is not None and time.time() - cached['fetched_at'] < self.cache_ttl:
+            logger.info(f"Using cached exchange rates for {len(cached['rates'])} currencies")
+            return cached['rates']
+        
         try:
             logger.info("Fetching exchange rates from API")
-            response = requests.get(self.api_url, timeout=10)
+            response = _session.get(self.api_url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 rates = data['rates']
                 logger.info(f"Successfully fetched exchange rates for {len(rates)} currencies")
+                self._write_cache(rates)
                 return rates
             else:
                 logger.error(f"API request failed with status code {response.status_code}")
-                logger.info("Using fallback exchange rates")
-                return self._get_fallback_rates()
+                return self._get_fallback_rates(cached)
         
         except Exception as e:
             logger.error(f"Error fetching exchange rates: {str(e)}")
-            logger.info("Using fallback exchange rates")
-            return self._get_fallback_rates()
+            return self._get_fallback_rates(cached)
+    
+    def _read_cache(self):
+        """
+        Read previously fetched exchange rates from the cache file.
+        
+        Entries fetched from a different API URL or with an invalid timestamp
+        are treated as a cache miss.
+        
+        Returns:
+            dict: Cache entry with 'api_url', 'fetched_at' and 'rates' keys, or None if unavailable
+        """
+        if not self.cache_path or not self.cache_ttl:
+            return None
+        
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            if (
+                isinstance(cached, dict)
+                and cached.get('api_url') == self.api_url
+                and isinstance(cached.get('fetched_at'), (int, float))
+                and not isinstance(cached['fetched_at'], bool)
+                and isinstance(cached.get('rates'), dict)
+            ):
+                return cached
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exchange rate cache {self.cache_path}: {str(e)}")
+        return None
     
-    def _get_fallback_rates(self):
+    def _write_cache(self, rates):
+        """
+        Atomically write fetched exchange rates to the cache file.
+        
+        Args:
+            rates (dict): Dictionary of currency codes to exchange rates
+        """
+        if not self.cache_path or not self.cache_ttl:
+            return
+        
+        try:
+            cache_dir = Path(self.cache_path).parent
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Write to a temporary file first so readers never see a partial cache
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'api_url': self.api_url, 'fetched_at': time.time(), 'rates': rates}, f)
+                os.replace(tmp_path, self.cache_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write exchange rate cache {self.cache_path}: {str(e)}")
+    
+    def _get_fallback_rates(self, cached=None):
         """
         Get fallback exchange rates when API request fails.
         
+        Args:
+            cached (dict, optional): Expired cache entry to prefer over the static rates
+        
         Returns:
             dict: Dictionary of currency codes to exchange rates
         """
+        if cached is not None:
+            logger.info("Using expired cached exchange rates")
+            return cached['rates']
+        
+        logger.info("Using fallback exchange rates")
         return self.fallback_rates
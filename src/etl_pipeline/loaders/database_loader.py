@@ -4,12 +4,114 @@ Database Loader Module
 This module provides functionality to load data into a database.
 """
 
+import csv
+import io
 import logging
-from datetime import datetime
+import sqlite3
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pandas as pd
 from etl_pipeline.utils.database import DatabaseTransaction
 
+# psycopg2 is only required for the PostgreSQL load path
+try:
+    from psycopg2.extras import execute_values
+except ImportError:
+    execute_values = None
+
 logger = logging.getLogger('etl_pipeline.loaders.database')
 
+# Column order used when writing rows into the sales table
+_SALES_COLUMNS = [
+    'order_id', 'affiliate_name', 'sales_amount', 'currency',
+    'order_date', 'category', 'sales_amount_usd', 'month'
+]
+
+# Secondary indexes on the columns the reports group sales by
+_SALES_INDEXES = {
+    'idx_sales_affiliate': 'affiliate_name',
+    'idx_sales_category': 'category',
+    'idx_sales_month': 'month'
+}
+_SALES_INDEX_DDL = ''.join(
+    f"CREATE INDEX IF NOT EXISTS {name} ON sales ({column});\n"
+    for name, column in _SALES_INDEXES.items()
+)
+
+# Minimum number of rows for a bulk mode load to drop and rebuild the secondary indexes
+_BULK_INDEX_THRESHOLD = 100000
+
+# Schema for SQLite databases, executed as a single script
+_SQLITE_DDL = """
+-- Exchange rates table
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    currency TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Sales table
+CREATE TABLE IF NOT EXISTS sales (
+    order_id INTEGER PRIMARY KEY,
+    affiliate_name TEXT,
+    sales_amount REAL,
+    currency TEXT,
+    order_date TEXT,
+    category TEXT,
+    sales_amount_usd REAL,
+    month TEXT
+);
+"""
+
+# Schema for PostgreSQL databases, including the aggregated tables for reports
+_PG_DDL = """
+-- Exchange rates table
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    currency TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Sales table
+CREATE TABLE IF NOT EXISTS sales (
+    order_id INTEGER PRIMARY KEY,
+    affiliate_name TEXT,
+    sales_amount REAL,
+    currency TEXT,
+    order_date DATE,
+    category TEXT,
+    sales_amount_usd REAL,
+    month TEXT
+);
+
+-- Affiliate sales aggregation table
+CREATE TABLE IF NOT EXISTS fact_affiliate_sales (
+    affiliate_name TEXT PRIMARY KEY,
+    total_sales_usd REAL NOT NULL,
+    last_updated TIMESTAMP NOT NULL
+);
+
+-- Category sales aggregation table
+CREATE TABLE IF NOT EXISTS fact_category_sales (
+    category TEXT PRIMARY KEY,
+    total_sales_usd REAL NOT NULL,
+    last_updated TIMESTAMP NOT NULL
+);
+
+-- Monthly sales aggregation table
+CREATE TABLE IF NOT EXISTS fact_monthly_sales (
+    month TEXT PRIMARY KEY,
+    total_sales_usd REAL NOT NULL,
+    last_updated TIMESTAMP NOT NULL
+);
+"""
+
+# Number of rows inserted by each multi-row INSERT statement when loading into SQLite
+_SQLITE_ROWS_PER_STATEMENT = 500
+
+# Bound parameter limit of SQLite builds older than 3.32
+_SQLITE_DEFAULT_MAX_VARIABLES = 999
+
 
 class DatabaseLoader:
     """Class for loading data into a database."""
@@ -50,90 +152,23 @@ class DatabaseLoader:
     def _create_sqlite_tables(self):
         """Create tables for SQLite database."""
         with DatabaseTransaction(self.conn) as cursor:
-            # Exchange rates table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exchange_rates (
-                currency TEXT PRIMARY KEY,
-                rate REAL NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-            ''')
-            
-            # Sales table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sales (
-                order_id INTEGER PRIMARY KEY,
-                affiliate_name TEXT,
-                sales_amount REAL,
-                currency TEXT,
-                order_date TEXT,
-                category TEXT,
-                sales_amount_usd REAL,
-                month TEXT
-            )
-            ''')
+            cursor.executescript(_SQLITE_DDL + _SALES_INDEX_DDL)
     
     def _create_postgresql_tables(self):
         """Create tables for PostgreSQL database."""
         with DatabaseTransaction(self.conn) as cursor:
-            # Exchange rates table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exchange_rates (
-                currency TEXT PRIMARY KEY,
-                rate REAL NOT NULL,
-                updated_at TIMESTAMP NOT NULL
-            )
-            ''')
-            
-            # Sales table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sales (
-                order_id INTEGER PRIMARY KEY,
-                affiliate_name TEXT,
-                sales_amount REAL,
-                currency TEXT,
-                order_date DATE,
-                category TEXT,
-                sales_amount_usd REAL,
-                month TEXT
-            )
-            ''')
-            
-            # Aggregated data tables for reports
-            # Affiliate sales aggregation table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fact_affiliate_sales (
-                affiliate_name TEXT PRIMARY KEY,
-                total_sales_usd REAL NOT NULL,
-                last_updated TIMESTAMP NOT NULL
-            )
-            ''')
-            
-            # Category sales aggregation table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fact_category_sales (
-                category TEXT PRIMARY KEY,
-                total_sales_usd REAL NOT NULL,
-                last_updated TIMESTAMP NOT NULL
-            )
-            ''')
-            
-            # Monthly sales aggregation table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fact_monthly_sales (
-                month TEXT PRIMARY KEY,
-                total_sales_usd REAL NOT NULL,
-                last_updated TIMESTAMP NOT NULL
-            )
-            ''')
+            # PostgreSQL runs all statements of a single execute call in the current transaction
+            cursor.execute(_PG_DDL + _SALES_INDEX_DDL)
     
-    def load_data(self, transformed_df, exchange_rates):
+    def load_data(self, transformed_df, exchange_rates, bulk_mode=False):
         """
         Load transformed data into the database.
         
         Args:
             transformed_df (pandas.DataFrame): DataFrame containing the transformed data
             exchange_rates (dict): Dictionary of currency codes to exchange rates
+            bulk_mode (bool): Drop the secondary sales indexes while loading large
+                DataFrames and rebuild them afterwards in the same transaction
         
         Raises:
             Exception: If an error occurs during data loading
@@ -141,13 +176,14 @@ class DatabaseLoader:
         try:
             logger.info("Loading data into database")
             
-            # Insert exchange rates
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # Convert the sales data to row tuples once for the bulk load APIs
+            sales_rows = self._build_sales_rows(transformed_df)
+            rebuild_indexes = bulk_mode and len(sales_rows) >= _BULK_INDEX_THRESHOLD
             
             if self.db_type == 'sqlite':
-                self._load_data_sqlite(transformed_df, exchange_rates, current_time)
+                self._load_data_sqlite(sales_rows, exchange_rates, rebuild_indexes)
             elif self.db_type == 'postgresql':
-                self._load_data_postgresql(transformed_df, exchange_rates, current_time)
+                self._load_data_postgresql(sales_rows, exchange_rates, rebuild_indexes)
             else:
                 raise ValueError(f"Unsupported database type: {self.db_type}")
             
@@ -156,89 +192,327 @@ class DatabaseLoader:
             logger.error(f"Error loading data into database: {str(e)}")
             raise
     
-    def _load_data_sqlite(self, transformed_df, exchange_rates, current_time):
+    def load_chunks(self, transformed_chunks, exchange_rates, bulk_mode=False,
+                    connection_pool=None, max_workers=4):
         """
-        Load data into SQLite database.
+        Load an iterable of transformed DataFrame chunks into the database.
+        
+        Each chunk is loaded and committed on its own, so peak memory is bounded
+        by the chunk size. When an order id appears in several chunks, the row
+        from the first chunk wins, as it does when the whole file is loaded at once.
+        
+        With PostgreSQL and a connection pool, chunks are copied into a shared
+        staging table by parallel workers and merged into sales in one statement.
         
         Args:
-            transformed_df (pandas.DataFrame): DataFrame containing the transformed data
+            transformed_chunks (iterable): Iterable of pandas.DataFrame chunks containing the transformed data
             exchange_rates (dict): Dictionary of currency codes to exchange rates
-            current_time (str): Current timestamp as string
+            bulk_mode (bool): Drop the secondary sales indexes before the first chunk
+                and rebuild them once all chunks have been loaded
+            connection_pool (psycopg2.pool.ThreadedConnectionPool, optional): Pool the
+                parallel PostgreSQL workers take their connections from
+            max_workers (int): Number of parallel PostgreSQL workers
+        
+        Raises:
+            Exception: If an error occurs during data loading
+        """
+        if connection_pool is not None and self.db_type == 'postgresql':
+            self._load_chunks_parallel(transformed_chunks, exchange_rates, bulk_mode, connection_pool, max_workers)
+            return
+        
+        if bulk_mode:
+            with DatabaseTransaction(self.conn) as cursor:
+                self._drop_sales_indexes(cursor)
+        
+        total_records = 0
+        loaded_order_ids = set()
+        try:
+            for transformed_df in transformed_chunks:
+                # Skip orders already loaded from an earlier chunk so the first occurrence wins
+                transformed_df = transformed_df[~transformed_df['order_id'].isin(loaded_order_ids)]
+                if transformed_df.empty:
+                    continue
+                loaded_order_ids.update(transformed_df['order_id'].unique())
+                
+                self.load_data(transformed_df, exchange_rates)
+                total_records += len(transformed_df)
+        finally:
+            if bulk_mode:
+                with DatabaseTransaction(self.conn) as cursor:
+                    self._create_sales_indexes(cursor)
+        
+        logger.info(f"Successfully loaded {total_records} records into database in chunks")
+    
+    def _load_chunks_parallel(self, transformed_chunks, exchange_rates, bulk_mode, connection_pool, max_workers):
+        """
+        Load chunks into PostgreSQL with parallel COPY streams.
+        
+        Workers only append to an unlogged staging table, so they never contend
+        for rows of the sales table; a single merge then upserts all staged rows.
+        
+        Args:
+            transformed_chunks (iterable): Iterable of pandas.DataFrame chunks containing the transformed data
+            exchange_rates (dict): Dictionary of currency codes to exchange rates
+            bulk_mode (bool): Drop the secondary sales indexes during the merge
+            connection_pool (psycopg2.pool.ThreadedConnectionPool): Pool for the worker connections
+            max_workers (int): Number of parallel workers
+        
+        Raises:
+            Exception: If an error occurs during data loading
         """
+        logger.info(f"Loading data into database with {max_workers} parallel workers")
+        stage_table = f"sales_stage_{uuid.uuid4().hex[:12]}"
+        
         with DatabaseTransaction(self.conn) as cursor:
-            # Insert exchange rates
-            for currency, rate in exchange_rates.items():
-                cursor.execute(
-                    "INSERT OR REPLACE INTO exchange_rates (currency, rate, updated_at) VALUES (?, ?, ?)",
-                    (currency, rate, current_time)
-                )
+            self._upsert_exchange_rates_postgresql(cursor, exchange_rates)
+            # Unlike a temporary table, an unlogged table is visible to every pooled connection
+            cursor.execute(f"CREATE UNLOGGED TABLE {stage_table} (LIKE sales, chunk_no INTEGER NOT NULL)")
+        
+        try:
+            total_records = 0
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for chunk_no, transformed_df in enumerate(transformed_chunks):
+                    sales_rows = self._build_sales_rows(transformed_df)
+                    total_records += len(sales_rows)
+                    pending.add(executor.submit(self._copy_chunk, connection_pool, stage_table, chunk_no, sales_rows))
+                    
+                    # Bound the number of chunks held in memory while the workers catch up
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                
+                for future in pending:
+                    future.result()
             
-            # Insert sales data
-            for _, row in transformed_df.iterrows():
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO sales 
-                    (order_id, affiliate_name, sales_amount, currency, order_date, category, sales_amount_usd, month)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        row['order_id'],
-                        row['affiliate_name'],
-                        row['sales_amount'],
-                        row['currency'],
-                        row['order_date'],
-                        row['category'],
-                        row['sales_amount_usd'],
-                        row['month']
-                    )
-                )
+            with DatabaseTransaction(self.conn, bulk=True) as cursor:
+                if bulk_mode:
+                    self._drop_sales_indexes(cursor)
+                self._merge_sales_stage(cursor, stage_table, first_chunk_wins=True)
+                if bulk_mode:
+                    self._create_sales_indexes(cursor)
+        finally:
+            with DatabaseTransaction(self.conn) as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {stage_table}")
+        
+        logger.info(f"Successfully loaded {total_records} records into database in chunks")
     
-    def _load_data_postgresql(self, transformed_df, exchange_rates, current_time):
+    def _copy_chunk(self, connection_pool, stage_table, chunk_no, sales_rows):
         """
-        Load data into PostgreSQL database.
+        Copy one chunk of sales rows into the staging table on a pooled connection.
+        
+        Args:
+            connection_pool (psycopg2.pool.ThreadedConnectionPool): Pool to take the connection from
+            stage_table (str): Name of the staging table
+            chunk_no (int): Position of the chunk in the input
+            sales_rows (list): Sales row tuples ordered as the sales table columns
+        """
+        conn = connection_pool.getconn()
+        try:
+            with DatabaseTransaction(conn, bulk=True) as cursor:
+                self._copy_sales_rows(cursor, stage_table, sales_rows, chunk_no)
+        finally:
+            connection_pool.putconn(conn)
+    
+    def _drop_sales_indexes(self, cursor):
+        """
+        Drop the secondary sales indexes ahead of a bulk load.
+        
+        The primary key is kept because the upserts rely on it.
+        
+        Args:
+            cursor: A database cursor inside an open transaction
+        """
+        logger.info("Dropping secondary sales indexes for bulk load")
+        for name in _SALES_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    
+    def _create_sales_indexes(self, cursor):
+        """
+        Create the secondary sales indexes, e.g. after a bulk load.
+        
+        Args:
+            cursor: A database cursor inside an open transaction
+        """
+        logger.info("Rebuilding secondary sales indexes")
+        for name, column in _SALES_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON sales ({column})")
+    
+    def _build_sales_rows(self, transformed_df):
+        """
+        Convert the transformed DataFrame into a list of sales row tuples.
         
         Args:
             transformed_df (pandas.DataFrame): DataFrame containing the transformed data
+        
+        Returns:
+            list: Tuples of native Python values ordered as the sales table columns
+        """
+        # Format datetime order dates in one vectorized pass instead of per row in the driver
+        if pd.api.types.is_datetime64_any_dtype(transformed_df['order_date']):
+            transformed_df = transformed_df.assign(order_date=transformed_df['order_date'].dt.strftime('%Y-%m-%d'))
+        
+        # Nullable integer columns yield numpy scalars and pd.NA, which the drivers cannot bind
+        nullable = {
+            column: transformed_df[column].to_numpy(dtype=object, na_value=None)
+            for column in _SALES_COLUMNS
+            if isinstance(transformed_df[column].dtype, pd.api.extensions.ExtensionDtype)
+            and pd.api.types.is_integer_dtype(transformed_df[column])
+        }
+        if nullable:
+            transformed_df = transformed_df.assign(**nullable)
+        
+        return list(transformed_df[_SALES_COLUMNS].itertuples(index=False, name=None))
+    
+    def _load_data_sqlite(self, sales_rows, exchange_rates, rebuild_indexes=False):
+        """
+        Load data into SQLite database.
+        
+        Args:
+            sales_rows (list): Sales row tuples ordered as the sales table columns
             exchange_rates (dict): Dictionary of currency codes to exchange rates
-            current_time (str): Current timestamp as string
+            rebuild_indexes (bool): Drop the secondary sales indexes during the load
         """
         with DatabaseTransaction(self.conn) as cursor:
-            # Insert exchange rates
-            for currency, rate in exchange_rates.items():
-                cursor.execute(
-                    """
-                    INSERT INTO exchange_rates (currency, rate, updated_at)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (currency) DO UPDATE
-                    SET rate = EXCLUDED.rate, updated_at = EXCLUDED.updated_at
-                    """,
-                    (currency, rate, current_time)
-                )
+            if rebuild_indexes:
+                # sqlite3 only opens a transaction implicitly before DML, so begin one
+                # explicitly; otherwise DROP INDEX autocommits and a failed load
+                # leaves the table without its indexes
+                if not self.conn.in_transaction:
+                    cursor.execute("BEGIN")
+                self._drop_sales_indexes(cursor)
             
-            # Insert sales data
-            for _, row in transformed_df.iterrows():
+            # Insert exchange rates, timestamped by the database
+            cursor.executemany(
+                "INSERT OR REPLACE INTO exchange_rates (currency, rate, updated_at) VALUES (?, ?, datetime('now', 'localtime'))",
+                list(exchange_rates.items())
+            )
+            
+            # Insert sales data with multi-row INSERT statements so that SQLite
+            # parses one statement per batch instead of one per row
+            rows_per_statement = max(1, min(
+                _SQLITE_ROWS_PER_STATEMENT,
+                self._sqlite_max_variables() // len(_SALES_COLUMNS)
+            ))
+            columns = ', '.join(_SALES_COLUMNS)
+            row_placeholders = '(' + ', '.join(['?'] * len(_SALES_COLUMNS)) + ')'
+            
+            for start in range(0, len(sales_rows), rows_per_statement):
+                batch = sales_rows[start:start + rows_per_statement]
                 cursor.execute(
-                    """
-                    INSERT INTO sales 
-                    (order_id, affiliate_name, sales_amount, currency, order_date, category, sales_amount_usd, month)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (order_id) DO UPDATE
-                    SET affiliate_name = EXCLUDED.affiliate_name,
-                        sales_amount = EXCLUDED.sales_amount,
-                        currency = EXCLUDED.currency,
-                        order_date = EXCLUDED.order_date,
-                        category = EXCLUDED.category,
-                        sales_amount_usd = EXCLUDED.sales_amount_usd,
-                        month = EXCLUDED.month
-                    """,
-                    (
-                        row['order_id'],
-                        row['affiliate_name'],
-                        row['sales_amount'],
-                        row['currency'],
-                        row['order_date'],
-                        row['category'],
-                        row['sales_amount_usd'],
-                        row['month']
-                    )
+                    f"INSERT OR REPLACE INTO sales ({columns}) VALUES " + ', '.join([row_placeholders] * len(batch)),
+                    [value for row in batch for value in row]
                 )
+            
+            if rebuild_indexes:
+                self._create_sales_indexes(cursor)
+    
+    def _sqlite_max_variables(self):
+        """
+        Get the maximum number of bound parameters allowed in one SQLite statement.
+        
+        Returns:
+            int: Maximum number of bound parameters per statement
+        """
+        try:
+            return self.conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:
+            # Connection.getlimit is only available from Python 3.11
+            return _SQLITE_DEFAULT_MAX_VARIABLES
+    
+    def _load_data_postgresql(self, sales_rows, exchange_rates, rebuild_indexes=False):
+        """
+        Load data into PostgreSQL database.
+        
+        Args:
+            sales_rows (list): Sales row tuples ordered as the sales table columns
+            exchange_rates (dict): Dictionary of currency codes to exchange rates
+            rebuild_indexes (bool): Drop the secondary sales indexes during the load
+        """
+        with DatabaseTransaction(self.conn, bulk=True) as cursor:
+            if rebuild_indexes:
+                self._drop_sales_indexes(cursor)
+            
+            self._upsert_exchange_rates_postgresql(cursor, exchange_rates)
+            
+            # Stream sales data into a temporary staging table with COPY
+            cursor.execute("CREATE TEMP TABLE sales_stage (LIKE sales) ON COMMIT DROP")
+            self._copy_sales_rows(cursor, 'sales_stage', sales_rows)
+            self._merge_sales_stage(cursor, 'sales_stage')
+            
+            if rebuild_indexes:
+                self._create_sales_indexes(cursor)
+    
+    def _upsert_exchange_rates_postgresql(self, cursor, exchange_rates):
+        """
+        Upsert exchange rates into PostgreSQL, timestamped by the database.
+        
+        Args:
+            cursor: A database cursor inside an open transaction
+            exchange_rates (dict): Dictionary of currency codes to exchange rates
+        """
+        execute_values(
+            cursor,
+            """
+            INSERT INTO exchange_rates (currency, rate, updated_at)
+            VALUES %s
+            ON CONFLICT (currency) DO UPDATE
+            SET rate = EXCLUDED.rate, updated_at = NOW()
+            """,
+            list(exchange_rates.items()),
+            template="(%s, %s, NOW())",
+            page_size=100
+        )
+    
+    def _copy_sales_rows(self, cursor, table, sales_rows, chunk_no=None):
+        """
+        Stream sales rows into a PostgreSQL table with COPY.
+        
+        Args:
+            cursor: A database cursor inside an open transaction
+            table (str): Name of the table to copy into
+            sales_rows (list): Sales row tuples ordered as the sales table columns
+            chunk_no (int, optional): Chunk number written to the table's chunk_no column
+        """
+        columns = _SALES_COLUMNS if chunk_no is None else ['chunk_no'] + _SALES_COLUMNS
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if chunk_no is None:
+            writer.writerows(sales_rows)
+        else:
+            writer.writerows((chunk_no,) + row for row in sales_rows)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT CSV)", buffer)
+    
+    def _merge_sales_stage(self, cursor, stage_table, first_chunk_wins=False):
+        """
+        Upsert the rows of a staging table into the sales table in a single statement.
+        
+        Args:
+            cursor: A database cursor inside an open transaction
+            stage_table (str): Name of the staging table
+            first_chunk_wins (bool): Keep only the row from the lowest chunk_no
+                when an order id was staged more than once, as a whole-file load does
+        """
+        columns = ', '.join(_SALES_COLUMNS)
+        if first_chunk_wins:
+            source = f"SELECT DISTINCT ON (order_id) {columns} FROM {stage_table} ORDER BY order_id, chunk_no"
+        else:
+            source = f"SELECT {columns} FROM {stage_table}"
+        
+        cursor.execute(
+            f"""
+            INSERT INTO sales ({columns})
+            {source}
+            ON CONFLICT (order_id) DO UPDATE
+            SET affiliate_name = EXCLUDED.affiliate_name,
+                sales_amount = EXCLUDED.sales_amount,
+                currency = EXCLUDED.currency,
+                order_date = EXCLUDED.order_date,
+                category = EXCLUDED.category,
+                sales_amount_usd = EXCLUDED.sales_amount_usd,
+                month = EXCLUDED.month
+            """
+        )
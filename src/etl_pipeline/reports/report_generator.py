@@ -4,23 +4,54 @@ Report Generator Module
 This module provides functionality to generate reports from the database.
 """
 
+import functools
 import logging
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Reports are only rendered to files, so skip GUI backend setup
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import seaborn as sns
 from datetime import datetime
 from pathlib import Path
-from etl_pipeline.utils.database import DatabaseTransaction
+from etl_pipeline.utils.database import DatabaseTransaction, get_connection_url
+
+# Try to import connectorx for fast report queries
+try:
+    import connectorx as cx
+    CONNECTORX_AVAILABLE = True
+except ImportError:
+    CONNECTORX_AVAILABLE = False
 
 logger = logging.getLogger('etl_pipeline.reports.generator')
 
+# Buffer size used when writing CSV reports
+_CSV_BUFFER_SIZE = 1 << 20
+
+# Resolve the report style once instead of on every PDF generation
+plt.style.use('seaborn-v0_8-whitegrid')
+
+
+@functools.lru_cache(maxsize=None)
+def _palette(name, n_colors):
+    """
+    Resolve a seaborn palette once per name and size.
+    
+    Args:
+        name (str): Name of the seaborn palette
+        n_colors (int): Number of colors to return
+    
+    Returns:
+        list: RGB color tuples
+    """
+    return sns.color_palette(name, n_colors=n_colors)
+
 
 class ReportGenerator:
     """Class for generating reports from the database."""
     
-    def __init__(self, connection, db_type='sqlite', reports_dir='reports'):
+    def __init__(self, connection, db_type='sqlite', reports_dir='reports', report_formats=('csv',), db_config=None):
         """
         Initialize with a database connection and reports directory.
         
@@ -28,10 +59,15 @@ class ReportGenerator:
             connection: A database connection object
             db_type (str): Type of database ('sqlite' or 'postgresql')
             reports_dir (str): Directory to save reports
+            report_formats (tuple): Formats to write the table reports in ('csv', 'parquet', 'feather')
+            db_config (dict, optional): Database configuration; when given and connectorx is
+                installed, report queries are read through connectorx
         """
         self.conn = connection
         self.db_type = db_type.lower()
         self.reports_dir = reports_dir
+        self.report_formats = tuple(report_formats)
+        self.connection_url = get_connection_url(db_config) if CONNECTORX_AVAILABLE and db_config else None
         
         # Create reports directory if it doesn't exist
         Path(reports_dir).mkdir(exist_ok=True)
@@ -49,53 +85,34 @@ class ReportGenerator:
         try:
             logger.info("Starting report generation")
             
-            # Run queries
-            # 1. Total sales by affiliate
-            affiliate_sales = pd.read_sql_query(
-                "SELECT affiliate_name, SUM(sales_amount_usd) as total_sales_usd FROM sales GROUP BY affiliate_name ORDER BY total_sales_usd DESC",
-                self.conn
-            )
-            
-            # 2. Total sales by category
-            category_sales = pd.read_sql_query(
-                "SELECT category, SUM(sales_amount_usd) as total_sales_usd FROM sales GROUP BY category ORDER BY total_sales_usd DESC",
-                self.conn
-            )
+            # Timestamps shown on the report pages, formatted once per run
+            generated_at = datetime.now()
+            self._now_str = generated_at.strftime('%Y-%m-%d %H:%M:%S')
+            self._now_pretty = generated_at.strftime('%B %d, %Y at %I:%M %p')
             
-            # 3. Monthly sales summary
-            monthly_sales = pd.read_sql_query(
-                "SELECT month, SUM(sales_amount_usd) as total_sales_usd FROM sales GROUP BY month ORDER BY month",
-                self.conn
-            )
+            # Run a single aggregation query and derive all report tables from it
+            affiliate_sales, category_sales, monthly_sales, summary = self._query_sales_aggregates()
             
-            # 4. Overall summary
-            summary = pd.read_sql_query(
-                """
-                SELECT 
-                    COUNT(order_id) as total_orders,
-                    SUM(sales_amount_usd) as total_sales_usd,
-                    AVG(sales_amount_usd) as avg_order_value_usd,
-                    MIN(sales_amount_usd) as min_order_value_usd,
-                    MAX(sales_amount_usd) as max_order_value_usd
-                FROM sales
-                """,
-                self.conn
-            )
-            
-            # Generate CSV reports
-            logger.info("Generating CSV reports")
-            affiliate_sales.to_csv(f"{self.reports_dir}/affiliate_sales.csv", index=False)
-            category_sales.to_csv(f"{self.reports_dir}/category_sales.csv", index=False)
-            monthly_sales.to_csv(f"{self.reports_dir}/monthly_sales.csv", index=False)
+            # Generate table reports
+            self._write_table_reports({
+                'affiliate_sales': affiliate_sales,
+                'category_sales': category_sales,
+                'monthly_sales': monthly_sales
+            })
             
             # Store aggregated data in the database if using PostgreSQL
             if self.db_type == 'postgresql':
                 logger.info("Storing aggregated data in PostgreSQL data warehouse tables")
-                self._store_aggregated_data_in_postgres(affiliate_sales, category_sales, monthly_sales)
+                self._store_aggregated_data_in_postgres()
             
-            # Generate PDF report
+            # Generate PDF report from copies with categorical key columns
             logger.info("Generating PDF report")
-            self._generate_pdf_report(affiliate_sales, category_sales, monthly_sales, summary)
+            self._generate_pdf_report(
+                self._compact_for_display(affiliate_sales, 'affiliate_name'),
+                self._compact_for_display(category_sales, 'category'),
+                self._compact_for_display(monthly_sales, 'month'),
+                summary
+            )
             
             logger.info("Report generation completed successfully")
             return True
@@ -103,62 +120,209 @@ class ReportGenerator:
             logger.error(f"Error generating reports: {str(e)}")
             return False
     
-    def _store_aggregated_data_in_postgres(self, affiliate_sales, category_sales, monthly_sales):
+    def _query_sales_aggregates(self):
+        """
+        Compute all report tables with a single scan of the sales table.
+        
+        PostgreSQL evaluates every grouping in one GROUPING SETS query, in double
+        precision so every driver returns the same values. SQLite
+        has no grouping sets, so sales are grouped once by affiliate, category
+        and month and rolled up into the report tables in pandas.
+        
+        Returns:
+            tuple: DataFrames of (affiliate_sales, category_sales, monthly_sales, summary)
+        """
+        if self.db_type == 'postgresql':
+            affiliate_sales, category_sales, monthly_sales, summary = self._query_grouping_sets()
+        else:
+            affiliate_sales, category_sales, monthly_sales, summary = self._query_rolled_up_groups()
+        
+        # Order the tables as the reports present them
+        affiliate_sales = affiliate_sales.sort_values(
+            'total_sales_usd', ascending=False, kind='stable', ignore_index=True
+        )
+        category_sales = category_sales.sort_values(
+            'total_sales_usd', ascending=False, kind='stable', ignore_index=True
+        )
+        monthly_sales = monthly_sales.sort_values('month', kind='stable', ignore_index=True)
+        
+        return affiliate_sales, category_sales, monthly_sales, summary
+    
+    def _read_sql(self, query):
         """
-        Store aggregated report data in PostgreSQL data warehouse tables.
+        Run a report query and return its result as a DataFrame.
+        
+        connectorx reads the result straight into column arrays over its own
+        connection; without it, the query runs on the pipeline connection.
         
         Args:
-            affiliate_sales (pandas.DataFrame): DataFrame containing affiliate sales data
-            category_sales (pandas.DataFrame): DataFrame containing category sales data
-            monthly_sales (pandas.DataFrame): DataFrame containing monthly sales data
+            query (str): SQL query to run
+        
+        Returns:
+            pandas.DataFrame: The query result
+        """
+        if self.connection_url:
+            try:
+                return cx.read_sql(self.connection_url, query, return_type='pandas')
+            except Exception as e:
+                logger.warning(f"connectorx query failed, falling back to pandas: {str(e)}")
+        
+        return pd.read_sql_query(query, self.conn)
+    
+    def _query_grouping_sets(self):
+        """
+        Compute the report tables in PostgreSQL with one GROUPING SETS query.
+        
+        Returns:
+            tuple: Unsorted DataFrames of (affiliate_sales, category_sales, monthly_sales, summary)
+        """
+        groups = self._read_sql(
+            """
+            SELECT 
+                CASE
+                    WHEN GROUPING(affiliate_name) = 0 THEN 'affiliate'
+                    WHEN GROUPING(category) = 0 THEN 'category'
+                    WHEN GROUPING(month) = 0 THEN 'month'
+                    ELSE 'summary'
+                END as dimension,
+                affiliate_name,
+                category,
+                month,
+                COUNT(order_id) as total_orders,
+                SUM(sales_amount_usd::float8) as total_sales_usd,
+                AVG(sales_amount_usd::float8) as avg_order_value_usd,
+                MIN(sales_amount_usd::float8) as min_order_value_usd,
+                MAX(sales_amount_usd::float8) as max_order_value_usd
+            FROM sales
+            GROUP BY GROUPING SETS ((affiliate_name), (category), (month), ())
+            """
+        )
+        
+        def rows_for(dimension, columns):
+            return groups.loc[groups['dimension'] == dimension, columns].reset_index(drop=True)
+        
+        return (
+            rows_for('affiliate', ['affiliate_name', 'total_sales_usd']),
+            rows_for('category', ['category', 'total_sales_usd']),
+            rows_for('month', ['month', 'total_sales_usd']),
+            rows_for('summary', [
+                'total_orders', 'total_sales_usd', 'avg_order_value_usd',
+                'min_order_value_usd', 'max_order_value_usd'
+            ])
+        )
+    
+    def _query_rolled_up_groups(self):
+        """
+        Group sales once by affiliate, category and month and roll them up in pandas.
+        
+        Returns:
+            tuple: Unsorted DataFrames of (affiliate_sales, category_sales, monthly_sales, summary)
+        """
+        groups = self._read_sql(
+            """
+            SELECT 
+                affiliate_name,
+                category,
+                month,
+                COUNT(order_id) as order_count,
+                COUNT(sales_amount_usd) as amount_count,
+                SUM(sales_amount_usd) as total_sales_usd,
+                MIN(sales_amount_usd) as min_sales_usd,
+                MAX(sales_amount_usd) as max_sales_usd
+            FROM sales
+            GROUP BY affiliate_name, category, month
+            """
+        )
+        
+        def total_by(column):
+            totals = groups.groupby(column, dropna=False, sort=False)['total_sales_usd'].sum(min_count=1)
+            return totals.reset_index()
+        
+        total_sales = groups['total_sales_usd'].sum(min_count=1)
+        amount_count = groups['amount_count'].sum()
+        summary = pd.DataFrame({
+            'total_orders': [int(groups['order_count'].sum())],
+            'total_sales_usd': [total_sales],
+            'avg_order_value_usd': [total_sales / amount_count if amount_count else np.nan],
+            'min_order_value_usd': [groups['min_sales_usd'].min()],
+            'max_order_value_usd': [groups['max_sales_usd'].max()]
+        })
+        
+        return total_by('affiliate_name'), total_by('category'), total_by('month'), summary
+    
+    def _write_table_reports(self, tables):
+        """
+        Write each report table in every configured output format.
+        
+        Parquet and Feather output require pyarrow.
+        
+        Args:
+            tables (dict): Mapping of report file names (without extension) to DataFrames
+        """
+        if 'csv' in self.report_formats:
+            logger.info("Generating CSV reports")
+            for name, data in tables.items():
+                # Write through a 1 MiB buffer so large reports hit the disk in few syscalls
+                with open(f"{self.reports_dir}/{name}.csv", 'wb', buffering=_CSV_BUFFER_SIZE) as f:
+                    data.to_csv(f, index=False)
+        
+        if 'parquet' in self.report_formats:
+            logger.info("Generating Parquet reports")
+            for name, data in tables.items():
+                data.to_parquet(f"{self.reports_dir}/{name}.parquet", index=False, compression='zstd')
+        
+        if 'feather' in self.report_formats:
+            logger.info("Generating Feather reports")
+            for name, data in tables.items():
+                data.to_feather(f"{self.reports_dir}/{name}.feather")
+    
+    def _compact_for_display(self, data, key_column):
+        """
+        Convert the key column of a report table to a categorical for rendering.
+        
+        The categories keep the row order, so charts draw the bars in the same
+        order as before. The sales totals stay float64 so large amounts keep
+        their cents.
+        
+        Args:
+            data (pandas.DataFrame): Report table with a key column and total_sales_usd
+            key_column (str): Name of the key column
+        
+        Returns:
+            pandas.DataFrame: A converted copy of the table
+        """
+        return data.assign(**{
+            key_column: pd.Categorical(data[key_column], categories=data[key_column].dropna().unique())
+        })
+    
+    def _store_aggregated_data_in_postgres(self):
+        """
+        Store aggregated sales data in PostgreSQL data warehouse tables.
+        
+        The aggregation and upsert run inside the database, so no rows are
+        sent back and forth between the database and the pipeline.
         
         Returns:
             bool: True if data was stored successfully, False otherwise
         """
         try:
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            with DatabaseTransaction(self.conn) as cursor:
-                # Store affiliate sales data
-                logger.info("Storing affiliate sales data in PostgreSQL")
-                for _, row in affiliate_sales.iterrows():
+            with DatabaseTransaction(self.conn, bulk=True) as cursor:
+                for label, table, key_column in (
+                    ('affiliate', 'fact_affiliate_sales', 'affiliate_name'),
+                    ('category', 'fact_category_sales', 'category'),
+                    ('monthly', 'fact_monthly_sales', 'month')
+                ):
+                    logger.info(f"Storing {label} sales data in PostgreSQL")
                     cursor.execute(
-                        """
-                        INSERT INTO fact_affiliate_sales (affiliate_name, total_sales_usd, last_updated)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (affiliate_name) DO UPDATE
+                        f"""
+                        INSERT INTO {table} ({key_column}, total_sales_usd, last_updated)
+                        SELECT {key_column}, SUM(sales_amount_usd::float8), NOW()
+                        FROM sales
+                        GROUP BY {key_column}
+                        ON CONFLICT ({key_column}) DO UPDATE
                         SET total_sales_usd = EXCLUDED.total_sales_usd,
                             last_updated = EXCLUDED.last_updated
-                        """,
-                        (row['affiliate_name'], row['total_sales_usd'], current_time)
-                    )
-                
-                # Store category sales data
-                logger.info("Storing category sales data in PostgreSQL")
-                for _, row in category_sales.iterrows():
-                    cursor.execute(
-                        """
-                        INSERT INTO fact_category_sales (category, total_sales_usd, last_updated)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (category) DO UPDATE
-                        SET total_sales_usd = EXCLUDED.total_sales_usd,
-                            last_updated = EXCLUDED.last_updated
-                        """,
-                        (row['category'], row['total_sales_usd'], current_time)
-                    )
-                
-                # Store monthly sales data
-                logger.info("Storing monthly sales data in PostgreSQL")
-                for _, row in monthly_sales.iterrows():
-                    cursor.execute(
                         """
-                        INSERT INTO fact_monthly_sales (month, total_sales_usd, last_updated)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (month) DO UPDATE
-                        SET total_sales_usd = EXCLUDED.total_sales_usd,
-                            last_updated = EXCLUDED.last_updated
-                        """,
-                        (row['month'], row['total_sales_usd'], current_time)
                     )
             
             logger.info("Successfully stored all aggregated data in PostgreSQL")
@@ -171,6 +335,9 @@ class ReportGenerator:
         """
         Generate a professional PDF report with visualizations.
         
+        A single Figure is reused for every page and cleared in between, so the
+        pyplot state machine is only touched once per report.
+        
         Args:
             affiliate_sales (pandas.DataFrame): DataFrame containing affiliate sales data
             category_sales (pandas.DataFrame): DataFrame containing category sales data
@@ -180,122 +347,116 @@ class ReportGenerator:
         Returns:
             bool: True if PDF was generated successfully, False otherwise
         """
+        fig = None
         try:
             # Set up the PDF
             pdf_path = f"{self.reports_dir}/sales_report.pdf"
             with PdfPages(pdf_path) as pdf:
-                # Set style for better visualization
-                plt.style.use('seaborn-v0_8-whitegrid')
+                # One letter-sized figure is reused for every page
+                fig = plt.figure(figsize=(8.5, 11))
                 
                 # Create a professional cover page
-                plt.figure(figsize=(8.5, 11))
-                plt.axis('off')
+                ax = fig.add_subplot()
+                ax.axis('off')
                 
                 # No border on the first page for a cleaner look
                 
-                # Add title and subtitle with better formatting
-                plt.text(0.5, 0.85, 'SALES REPORT', fontsize=28, ha='center', weight='bold', color='#003366')
-                plt.text(0.5, 0.78, 'Executive Summary', fontsize=18, ha='center', style='italic', color='#666666')
-                plt.text(0.5, 0.72, f'Generated on {datetime.now().strftime("%B %d, %Y at %I:%M %p")}', 
-                         fontsize=12, ha='center', color='#666666')
-                
-                # Add a horizontal separator line
-                plt.axhline(y=0.68, xmin=0.1, xmax=0.9, color='#003366', linewidth=2)
-                
                 # Format summary statistics in a more professional way
-                plt.text(0.5, 0.60, 'SUMMARY STATISTICS', fontsize=14, ha='center', weight='bold', color='#003366')
-                
-                # Create a formatted summary text with proper alignment and spacing
                 total_orders = summary['total_orders'].values[0]
                 total_sales = summary['total_sales_usd'].values[0]
                 avg_order = summary['avg_order_value_usd'].values[0]
                 min_order = summary['min_order_value_usd'].values[0]
                 max_order = summary['max_order_value_usd'].values[0]
                 
+                # Title, subtitle and section heading
+                cover_texts = [
+                    (0.5, 0.85, 'SALES REPORT', dict(fontsize=28, ha='center', weight='bold', color='#003366')),
+                    (0.5, 0.78, 'Executive Summary', dict(fontsize=18, ha='center', style='italic', color='#666666')),
+                    (0.5, 0.72, f'Generated on {self._now_pretty}',
+                     dict(fontsize=12, ha='center', color='#666666')),
+                    (0.5, 0.60, 'SUMMARY STATISTICS', dict(fontsize=14, ha='center', weight='bold', color='#003366'))
+                ]
+                
                 # Create a table-like structure for summary statistics
                 col1_x = 0.25
                 col2_x = 0.75
                 row_start = 0.55
                 row_height = 0.05
                 
-                # Row 1
-                plt.text(col1_x, row_start, 'Total Orders:', fontsize=12, ha='right', weight='bold')
-                plt.text(col2_x, row_start, f"{total_orders:,}", fontsize=12, ha='left')
-                
-                # Row 2
-                plt.text(col1_x, row_start-row_height, 'Total Sales (USD):', fontsize=12, ha='right', weight='bold')
-                plt.text(col2_x, row_start-row_height, f"${total_sales:,.2f}", fontsize=12, ha='left')
-                
-                # Row 3
-                plt.text(col1_x, row_start-2*row_height, 'Average Order Value:', fontsize=12, ha='right', weight='bold')
-                plt.text(col2_x, row_start-2*row_height, f"${avg_order:,.2f}", fontsize=12, ha='left')
+                summary_rows = [
+                    ('Total Orders:', f"{total_orders:,}"),
+                    ('Total Sales (USD):', f"${total_sales:,.2f}"),
+                    ('Average Order Value:', f"${avg_order:,.2f}"),
+                    ('Minimum Order Value:', f"${min_order:,.2f}"),
+                    ('Maximum Order Value:', f"${max_order:,.2f}")
+                ]
+                for i, (label, value) in enumerate(summary_rows):
+                    y = row_start - i * row_height
+                    cover_texts.append((col1_x, y, label, dict(fontsize=12, ha='right', weight='bold')))
+                    cover_texts.append((col2_x, y, value, dict(fontsize=12, ha='left')))
                 
-                # Row 4
-                plt.text(col1_x, row_start-3*row_height, 'Minimum Order Value:', fontsize=12, ha='right', weight='bold')
-                plt.text(col2_x, row_start-3*row_height, f"${min_order:,.2f}", fontsize=12, ha='left')
+                # Add footer
+                cover_texts.append((0.5, 0.05, 'CONFIDENTIAL - FOR INTERNAL USE ONLY', dict(fontsize=8, ha='center', color='#999999')))
+                cover_texts.append((0.5, 0.03, 'ETL, Reporting & PDF Export Pipeline', dict(fontsize=8, ha='center', color='#999999')))
                 
-                # Row 5
-                plt.text(col1_x, row_start-4*row_height, 'Maximum Order Value:', fontsize=12, ha='right', weight='bold')
-                plt.text(col2_x, row_start-4*row_height, f"${max_order:,.2f}", fontsize=12, ha='left')
+                for x, y, text, kwargs in cover_texts:
+                    ax.text(x, y, text, **kwargs)
                 
-                # Add footer
-                plt.text(0.5, 0.05, 'CONFIDENTIAL - FOR INTERNAL USE ONLY', fontsize=8, ha='center', color='#999999')
-                plt.text(0.5, 0.03, 'ETL, Reporting & PDF Export Pipeline', fontsize=8, ha='center', color='#999999')
+                # Add a horizontal separator line
+                ax.axhline(y=0.68, xmin=0.1, xmax=0.9, color='#003366', linewidth=2)
                 
                 # Add the cover page to the PDF
-                pdf.savefig()
-                plt.close()
+                pdf.savefig(fig)
+                fig.clear()
                 
                 # Create charts page with better layout
-                plt.figure(figsize=(8.5, 11))
-                
                 # Add page title
-                plt.suptitle('Sales Performance Analysis', fontsize=16, y=0.98, weight='bold', color='#003366')
+                fig.suptitle('Sales Performance Analysis', fontsize=16, y=0.98, weight='bold', color='#003366')
                 
                 # Create affiliate sales chart with improved styling
-                plt.subplot(3, 1, 1)
-                ax1 = sns.barplot(x='total_sales_usd', y='affiliate_name', hue='affiliate_name', data=affiliate_sales, palette='Blues_d', legend=False)
-                plt.title('Sales by Affiliate (USD)', fontsize=12, pad=10)
-                plt.xlabel('Total Sales (USD)', fontsize=10)
-                plt.ylabel('Affiliate', fontsize=10)
+                ax1 = fig.add_subplot(3, 1, 1)
+                sns.barplot(x='total_sales_usd', y='affiliate_name', hue='affiliate_name', data=affiliate_sales, palette=_palette('Blues_d', len(affiliate_sales)), legend=False, dodge=False, ax=ax1)
+                ax1.set_title('Sales by Affiliate (USD)', fontsize=12, pad=10)
+                ax1.set_xlabel('Total Sales (USD)', fontsize=10)
+                ax1.set_ylabel('Affiliate', fontsize=10)
                 
-                # Add value labels to the bars
-                for i, v in enumerate(affiliate_sales['total_sales_usd']):
-                    ax1.text(v + 5, i, f"${v:.2f}", va='center', fontsize=8)
+                # Add value labels to the bars; seaborn draws one container per hue level
+                for container in ax1.containers:
+                    ax1.bar_label(container, fmt='$%.2f', padding=3, fontsize=8)
                 
                 # Create category sales chart with improved styling
-                plt.subplot(3, 1, 2)
-                ax2 = sns.barplot(x='total_sales_usd', y='category', hue='category', data=category_sales, palette='Greens_d', legend=False)
-                plt.title('Sales by Category (USD)', fontsize=12, pad=10)
-                plt.xlabel('Total Sales (USD)', fontsize=10)
-                plt.ylabel('Category', fontsize=10)
+                ax2 = fig.add_subplot(3, 1, 2)
+                sns.barplot(x='total_sales_usd', y='category', hue='category', data=category_sales, palette=_palette('Greens_d', len(category_sales)), legend=False, dodge=False, ax=ax2)
+                ax2.set_title('Sales by Category (USD)', fontsize=12, pad=10)
+                ax2.set_xlabel('Total Sales (USD)', fontsize=10)
+                ax2.set_ylabel('Category', fontsize=10)
                 
-                # Add value labels to the bars
-                for i, v in enumerate(category_sales['total_sales_usd']):
-                    ax2.text(v + 5, i, f"${v:.2f}", va='center', fontsize=8)
+                # Add value labels to the bars; seaborn draws one container per hue level
+                for container in ax2.containers:
+                    ax2.bar_label(container, fmt='$%.2f', padding=3, fontsize=8)
                 
                 # Create monthly sales chart with improved styling
-                plt.subplot(3, 1, 3)
-                ax3 = sns.lineplot(x='month', y='total_sales_usd', data=monthly_sales, marker='o', color='#8B0000', linewidth=2)
-                plt.title('Monthly Sales Trend (USD)', fontsize=12, pad=10)
-                plt.xlabel('Month', fontsize=10)
-                plt.ylabel('Total Sales (USD)', fontsize=10)
-                plt.xticks(rotation=45)
+                ax3 = fig.add_subplot(3, 1, 3)
+                sns.lineplot(x='month', y='total_sales_usd', data=monthly_sales, marker='o', color='#8B0000', linewidth=2, ax=ax3)
+                ax3.set_title('Monthly Sales Trend (USD)', fontsize=12, pad=10)
+                ax3.set_xlabel('Month', fontsize=10)
+                ax3.set_ylabel('Total Sales (USD)', fontsize=10)
+                ax3.tick_params(axis='x', labelrotation=45)
                 
                 # Add value labels to the points
-                for i, (x, y) in enumerate(zip(monthly_sales['month'], monthly_sales['total_sales_usd'])):
+                for i, y in enumerate(monthly_sales['total_sales_usd']):
                     ax3.text(i, y + 50, f"${y:.2f}", ha='center', fontsize=8)
                 
-                plt.tight_layout(rect=[0, 0, 1, 0.96])  # Adjust layout to accommodate the title
+                fig.tight_layout(rect=[0, 0, 1, 0.96])  # Adjust layout to accommodate the title
                 
                 # Add the charts page to the PDF
-                pdf.savefig()
-                plt.close()
+                pdf.savefig(fig)
                 
                 # Create a more professional tables page
                 # Affiliate sales table
                 self._create_table_page(
                     pdf, 
+                    fig,
                     'Sales by Affiliate', 
                     affiliate_sales, 
                     'This table shows the total sales amount in USD for each affiliate, sorted by highest sales.'
@@ -304,6 +465,7 @@ class ReportGenerator:
                 # Category sales table
                 self._create_table_page(
                     pdf, 
+                    fig,
                     'Sales by Category', 
                     category_sales, 
                     'This table shows the total sales amount in USD for each product category, sorted by highest sales.'
@@ -312,6 +474,7 @@ class ReportGenerator:
                 # Monthly sales table
                 self._create_table_page(
                     pdf, 
+                    fig,
                     'Monthly Sales Trend', 
                     monthly_sales, 
                     'This table shows the total sales amount in USD for each month, including unknown dates.'
@@ -322,31 +485,31 @@ class ReportGenerator:
         except Exception as e:
             logger.error(f"Error generating PDF report: {str(e)}")
             return False
+        finally:
+            if fig is not None:
+                plt.close(fig)
     
-    def _create_table_page(self, pdf, title, data, description):
+    def _create_table_page(self, pdf, fig, title, data, description):
         """
         Helper method to create a professional table page for the PDF report.
         
         Args:
             pdf: PdfPages object
+            fig (matplotlib.figure.Figure): Figure to draw the page on; it is cleared first
             title (str): Title of the table page
             data (pandas.DataFrame): DataFrame containing the data to display
             description (str): Description of the table
         """
-        plt.figure(figsize=(8.5, 11))
-        plt.axis('off')
-        
-        # Add page title
-        plt.text(0.5, 0.95, title, fontsize=16, ha='center', weight='bold', color='#003366')
-        
-        # Add description
-        plt.text(0.5, 0.9, description, fontsize=10, ha='center', style='italic', color='#666666')
+        fig.clear()
+        ax = fig.add_subplot()
+        ax.axis('off')
         
         # Format the data for the table
         # Round numeric values to 2 decimal places and add dollar signs
         formatted_data = data.copy()
         if 'total_sales_usd' in formatted_data.columns:
-            formatted_data['total_sales_usd'] = formatted_data['total_sales_usd'].apply(lambda x: f"${x:.2f}")
+            values = formatted_data['total_sales_usd'].to_numpy()
+            formatted_data['total_sales_usd'] = np.char.add('$', np.char.mod('%.2f', values))
         
         # Create the table with better formatting
         table_data = [formatted_data.columns.tolist()] + formatted_data.values.tolist()
@@ -355,7 +518,7 @@ class ReportGenerator:
         col_widths = [0.5, 0.3]  # Default widths
         
         # Create and style the table
-        table = plt.table(
+        table = ax.table(
             cellText=table_data,
             loc='center',
             cellLoc='center',
@@ -379,10 +542,15 @@ class ReportGenerator:
             # Add borders
             cell.set_edgecolor('#333333')
         
-        # Add footer
-        plt.text(0.5, 0.05, 'CONFIDENTIAL - FOR INTERNAL USE ONLY', fontsize=8, ha='center', color='#999999')
-        plt.text(0.5, 0.03, f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', fontsize=8, ha='center', color='#999999')
+        # Add page title, description and footer
+        page_texts = [
+            (0.5, 0.95, title, dict(fontsize=16, ha='center', weight='bold', color='#003366')),
+            (0.5, 0.9, description, dict(fontsize=10, ha='center', style='italic', color='#666666')),
+            (0.5, 0.05, 'CONFIDENTIAL - FOR INTERNAL USE ONLY', dict(fontsize=8, ha='center', color='#999999')),
+            (0.5, 0.03, f'Generated on {self._now_str}', dict(fontsize=8, ha='center', color='#999999'))
+        ]
+        for x, y, text, kwargs in page_texts:
+            ax.text(x, y, text, **kwargs)
         
         # Add the table page to the PDF
-        pdf.savefig()
-        plt.close()
+        pdf.savefig(fig)
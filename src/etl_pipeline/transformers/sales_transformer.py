@@ -5,6 +5,7 @@ This module provides functionality to transform and clean sales data.
 """
 
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -18,8 +19,11 @@ class SalesTransformer:
         """
         Transform and clean the sales data.
         
+        The input DataFrame is cleaned in place instead of being copied first,
+        so callers must not rely on its contents afterwards.
+        
         Args:
-            df (pandas.DataFrame): DataFrame containing the raw sales data
+            df (pandas.DataFrame): DataFrame containing the raw sales data; modified in place
             exchange_rates (dict): Dictionary of currency codes to exchange rates
         
         Returns:
@@ -28,19 +32,17 @@ class SalesTransformer:
         try:
             logger.info("Starting data transformation")
             
-            # Make a copy to avoid SettingWithCopyWarning
-            transformed_df = df.copy()
+            # Work on the input directly; copying it would double peak memory
+            transformed_df = df
             
             # Handle missing values
             logger.info("Handling missing values")
-            # Fill missing affiliate names with 'Unknown'
-            transformed_df['affiliate_name'] = transformed_df['affiliate_name'].fillna('Unknown')
-            
-            # Fill missing categories with 'Uncategorized'
-            transformed_df['category'] = transformed_df['category'].fillna('Uncategorized')
-            
-            # Fill missing currencies with 'USD' (default)
-            transformed_df['currency'] = transformed_df['currency'].fillna('USD')
+            # Fill missing affiliate names with 'Unknown', missing categories with
+            # 'Uncategorized' and missing currencies with 'USD' (default)
+            transformed_df.fillna(
+                {'affiliate_name': 'Unknown', 'category': 'Uncategorized', 'currency': 'USD'},
+                inplace=True
+            )
             
             # Handle missing dates with 'Unknown' for reporting purposes
             logger.info("Standardizing date format")
@@ -48,14 +50,13 @@ class SalesTransformer:
             
             # Create a month column before handling missing dates
             # For missing dates, use 'Unknown' as the month
-            transformed_df['month'] = transformed_df['order_date'].apply(
-                lambda x: x.strftime('%Y-%m') if pd.notna(x) else 'Unknown'
-            )
+            months = transformed_df['order_date'].dt.strftime('%Y-%m')
+            transformed_df['month'] = months.where(transformed_df['order_date'].notna(), 'Unknown')
             
             # Now fill missing dates with current date for database consistency
+            # Dates stay datetime64 here; the loader formats them when writing rows
             current_date = datetime.now()
             transformed_df['order_date'] = transformed_df['order_date'].fillna(current_date)
-            transformed_df['order_date'] = transformed_df['order_date'].dt.strftime('%Y-%m-%d')
             
             # Convert sales amount to numeric, replacing non-numeric values with NaN
             transformed_df['sales_amount'] = pd.to_numeric(transformed_df['sales_amount'], errors='coerce')
@@ -66,11 +67,19 @@ class SalesTransformer:
             # Convert currencies to USD
             logger.info("Converting currencies to USD")
             
-            # Create a new column for USD amounts
-            transformed_df['sales_amount_usd'] = transformed_df.apply(
-                lambda row: self._convert_to_usd(row['sales_amount'], row['currency'], exchange_rates),
-                axis=1
-            )
+            # Create a new column for USD amounts in one vectorized pass
+            # Currencies are encoded once so each distinct currency's rate is looked up once;
+            # USD and currencies without a known rate use a rate of 1.0
+            amounts = transformed_df['sales_amount'].to_numpy(dtype=float)
+            codes, currencies = pd.factorize(transformed_df['currency'])
+            currency_rates = currencies.map(exchange_rates).to_series().fillna(1.0).to_numpy(dtype=float, copy=True)
+            currency_rates[currencies == 'USD'] = 1.0
+            
+            # Convert from currency to USD
+            # Rates are USD to currency, so we divide; a zero rate yields 0.0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                usd_amounts = amounts / currency_rates[codes]
+            transformed_df['sales_amount_usd'] = np.nan_to_num(usd_amounts, nan=0.0, posinf=0.0, neginf=0.0)
             
             # Remove duplicates
             logger.info("Removing duplicate records")
@@ -84,32 +93,3 @@ class SalesTransformer:
         except Exception as e:
             logger.error(f"Error during data transformation: {str(e)}")
             raise
-    
-    def _convert_to_usd(self, amount, currency, exchange_rates):
-        """
-        Helper function to convert amount to USD.
-        
-        Args:
-            amount (float): Amount in original currency
-            currency (str): Currency code
-            exchange_rates (dict): Dictionary of currency codes to exchange rates
-        
-        Returns:
-            float: Amount converted to USD
-        """
-        if pd.isna(amount) or pd.isna(currency):
-            return 0.0
-        
-        try:
-            if currency == 'USD':
-                return amount
-            
-            # Get the exchange rate (USD to currency)
-            rate = exchange_rates.get(currency, 1.0)
-            
-            # Convert from currency to USD
-            # If rate is USD to currency, then we divide
-            return amount / rate
-        except Exception as e:
-            logger.error(f"Error converting {amount} {currency} to USD: {str(e)}")
-            return 0.0
@@ -5,11 +5,15 @@ This module provides database connection and utility functions for the ETL pipel
 """
 
 import logging
+import os
 import sqlite3
+from urllib.parse import quote
 
 # Try to import psycopg2 for PostgreSQL support
 try:
     import psycopg2
+    import psycopg2.pool
+    import psycopg2.extensions
     from psycopg2 import sql
     from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
     POSTGRESQL_AVAILABLE = True
@@ -25,7 +29,7 @@ def get_database_connection(db_config):
     
     Args:
         db_config (dict): Database configuration dictionary
-            For SQLite: {'type': 'sqlite', 'db_path': 'path/to/db.sqlite'}
+            For SQLite: {'type': 'sqlite', 'db_path': 'path/to/db.sqlite', 'strict_durability': False}
             For PostgreSQL: {'type': 'postgresql', 'host': 'localhost', 'port': 5432, 
                             'database': 'sales', 'user': 'postgres', 'password': 'password'}
     
@@ -43,45 +47,155 @@ def get_database_connection(db_config):
             raise ValueError("db_path is required for SQLite connection")
         
         logger.info(f"Creating/connecting to SQLite database at {db_config.get('db_path')}")
-        return sqlite3.connect(db_config['db_path'])
+        conn = sqlite3.connect(db_config['db_path'])
+        _configure_sqlite(conn, db_config.get('strict_durability', False))
+        return conn
     
     elif db_type == 'postgresql':
-        if not POSTGRESQL_AVAILABLE:
-            raise ImportError("psycopg2 is required for PostgreSQL connection but not installed")
+        conn_string = _postgresql_conn_string(db_config)
         
+        logger.info(f"Connecting to PostgreSQL database at {db_config.get('host')}")
+        return psycopg2.connect(conn_string)
+    
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+
+def get_connection_pool(db_config, maxconn=8):
+    """
+    Create a thread-safe PostgreSQL connection pool.
+    
+    Args:
+        db_config (dict): PostgreSQL configuration dictionary, see get_database_connection
+        maxconn (int): Maximum number of connections held by the pool
+    
+    Returns:
+        psycopg2.pool.ThreadedConnectionPool: A pool handing out connections to worker threads
+    
+    Raises:
+        ValueError: If required configuration parameters are missing
+        ImportError: If psycopg2 is not installed
+    """
+    conn_string = _postgresql_conn_string(db_config)
+    
+    logger.info(f"Creating PostgreSQL connection pool with up to {maxconn} connections to {db_config.get('host')}")
+    return psycopg2.pool.ThreadedConnectionPool(1, maxconn, conn_string)
+
+
+def get_connection_url(db_config):
+    """
+    Build a database URL from the configuration, e.g. for connectorx.
+    
+    Args:
+        db_config (dict): Database configuration dictionary, see get_database_connection
+    
+    Returns:
+        str: The database URL
+    
+    Raises:
+        ValueError: If the database type is unsupported or required parameters are missing
+    """
+    db_type = db_config.get('type', 'sqlite').lower()
+    
+    if db_type == 'sqlite':
+        if 'db_path' not in db_config:
+            raise ValueError("db_path is required for SQLite connection")
+        return f"sqlite://{os.path.abspath(db_config['db_path'])}"
+    
+    elif db_type == 'postgresql':
         required_params = ['host', 'database', 'user', 'password']
         for param in required_params:
             if param not in db_config:
                 raise ValueError(f"{param} is required for PostgreSQL connection")
         
-        # Create connection string
-        conn_string = f"host={db_config['host']} "
+        netloc = f"{quote(db_config['user'], safe='')}:{quote(db_config['password'], safe='')}@{quote(db_config['host'], safe='')}"
         if 'port' in db_config:
-            conn_string += f"port={db_config['port']} "
-        conn_string += f"dbname={db_config['database']} user={db_config['user']} password={db_config['password']}"
-        
-        logger.info(f"Connecting to PostgreSQL database at {db_config.get('host')}")
-        return psycopg2.connect(conn_string)
+            netloc += f":{db_config['port']}"
+        return f"postgresql://{netloc}/{quote(db_config['database'], safe='')}"
     
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
 
+def _postgresql_conn_string(db_config):
+    """
+    Build a libpq connection string from the PostgreSQL configuration.
+    
+    Args:
+        db_config (dict): PostgreSQL configuration dictionary
+    
+    Returns:
+        str: The connection string
+    
+    Raises:
+        ValueError: If required configuration parameters are missing
+        ImportError: If psycopg2 is not installed
+    """
+    if not POSTGRESQL_AVAILABLE:
+        raise ImportError("psycopg2 is required for PostgreSQL connection but not installed")
+    
+    required_params = ['host', 'database', 'user', 'password']
+    for param in required_params:
+        if param not in db_config:
+            raise ValueError(f"{param} is required for PostgreSQL connection")
+    
+    # Create connection string
+    conn_string = f"host={db_config['host']} "
+    if 'port' in db_config:
+        conn_string += f"port={db_config['port']} "
+    conn_string += f"dbname={db_config['database']} user={db_config['user']} password={db_config['password']}"
+    return conn_string
+
+
+def _configure_sqlite(conn, strict_durability=False):
+    """
+    Tune a SQLite connection for bulk loading and report queries.
+    
+    Write-ahead logging with synchronous=NORMAL means a commit only appends to
+    the WAL without an fsync; the database can lose the last transactions on
+    power loss but cannot be corrupted. With strict_durability the connection
+    uses a rollback journal and fsyncs on every commit instead.
+    Temporary tables and indexes are always kept in memory, the page cache is
+    raised to 256 MiB and up to 256 MiB of the file is memory-mapped for reads.
+    
+    Args:
+        conn (sqlite3.Connection): The SQLite connection to configure
+        strict_durability (bool): Use a rollback journal with synchronous=FULL
+    """
+    if strict_durability:
+        # The journal mode is persistent, so switch databases left in WAL mode back
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.execute('PRAGMA synchronous=FULL')
+    else:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-262144')
+    conn.execute('PRAGMA mmap_size=268435456')
+
+
 class DatabaseTransaction:
     """Context manager for database transactions."""
     
-    def __init__(self, connection):
+    def __init__(self, connection, *, bulk=False):
         """
         Initialize with a database connection.
         
         Args:
             connection: A database connection object
+            bulk (bool): Relax commit durability for a bulk write. On PostgreSQL the
+                commit then returns without waiting for the WAL flush; a crash can
+                lose the transaction but cannot corrupt the database.
         """
         self.connection = connection
+        self.bulk = bulk
     
     def __enter__(self):
         """Enter the context manager."""
-        return self.connection.cursor()
+        cursor = self.connection.cursor()
+        if self.bulk and POSTGRESQL_AVAILABLE and isinstance(self.connection, psycopg2.extensions.connection):
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+        return cursor
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit the context manager, committing or rolling back as appropriate."""
@@ -4,8 +4,11 @@ Logging Configuration Module
 This module provides functions to configure logging for the ETL pipeline.
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
@@ -28,15 +31,28 @@ def configure_logging(config):
     log_path = Path(log_file)
     log_path.parent.mkdir(exist_ok=True)
     
-    # Configure logging
-    logging.basicConfig(
-        level=log_level,
-        format=log_format,
-        handlers=[
+    # Configure logging unless the root logger already has handlers, like basicConfig
+    if not logging.getLogger().handlers:
+        formatter = logging.Formatter(log_format)
+        handlers = [
             logging.FileHandler(log_file),
             logging.StreamHandler(sys.stdout)
         ]
-    )
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        # Loggers only enqueue records; a background thread formats and writes them
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        # The listener's handlers apply the real format, so the queue handler only
+        # merges the message arguments
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        
+        logging.basicConfig(level=log_level, handlers=[queue_handler])
     
     # Create logger
     logger = logging.getLogger('etl_pipeline')
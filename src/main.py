@@ -8,14 +8,35 @@ transformation, loading, and reporting processes.
 
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from etl_pipeline.config.settings import load_config
 from etl_pipeline.utils.logging_config import configure_logging
-from etl_pipeline.extractors.csv_extractor import CsvExtractor
+from etl_pipeline.extractors.csv_extractor import CsvExtractor, SALES_CSV_SCHEMA
 from etl_pipeline.extractors.exchange_rate_extractor import ExchangeRateExtractor
 from etl_pipeline.transformers.sales_transformer import SalesTransformer
 from etl_pipeline.loaders.database_loader import DatabaseLoader
 from etl_pipeline.reports.report_generator import ReportGenerator
-from etl_pipeline.utils.database import get_database_connection
+from etl_pipeline.utils.database import get_connection_pool, get_database_connection
+
+
+def extract_sources(csv_extractor, exchange_rate_extractor):
+    """
+    Run the CSV and exchange rate extractions concurrently.
+    
+    Both extractions are I/O bound and independent of each other, so running
+    them in threads makes the extraction phase take as long as the slower one.
+    
+    Args:
+        csv_extractor (CsvExtractor): Extractor for the sales data
+        exchange_rate_extractor (ExchangeRateExtractor): Extractor for the exchange rates
+    
+    Returns:
+        tuple: The extracted sales data and the dictionary of exchange rates
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sales_future = executor.submit(csv_extractor.extract)
+        rates_future = executor.submit(exchange_rate_extractor.extract)
+        return sales_future.result(), rates_future.result()
 
 
 def main():
@@ -32,16 +53,22 @@ def main():
         
         # Extract data
         logger.info("Starting extraction phase")
-        csv_extractor = CsvExtractor(config.get('csv_path'))
-        sales_data = csv_extractor.extract()
-        
+        csv_extractor = CsvExtractor(
+            config.get('csv_path'),
+            chunksize=config.get('csv_chunksize'),
+            schema=SALES_CSV_SCHEMA
+        )
         exchange_rate_extractor = ExchangeRateExtractor()
-        exchange_rates = exchange_rate_extractor.extract()
+        sales_data, exchange_rates = extract_sources(csv_extractor, exchange_rate_extractor)
         
         # Transform data
         logger.info("Starting transformation phase")
         transformer = SalesTransformer()
-        transformed_data = transformer.transform(sales_data, exchange_rates)
+        if csv_extractor.chunksize:
+            # Chunks are transformed lazily as the loader consumes them
+            transformed_data = (transformer.transform(chunk, exchange_rates) for chunk in sales_data)
+        else:
+            transformed_data = transformer.transform(sales_data, exchange_rates)
         
         # Load data
         logger.info("Starting loading phase")
@@ -50,14 +77,36 @@ def main():
         
         loader = DatabaseLoader(conn, db_config.get('type', 'sqlite'))
         loader.create_tables()
-        loader.load_data(transformed_data, exchange_rates)
+        bulk_mode = config.get('bulk_load', False)
+        if csv_extractor.chunksize:
+            # PostgreSQL chunks are copied by parallel workers with their own connections
+            load_workers = config.get('load_workers', 4)
+            connection_pool = None
+            if db_config.get('type') == 'postgresql' and load_workers > 1:
+                connection_pool = get_connection_pool(db_config, maxconn=load_workers)
+            
+            try:
+                loader.load_chunks(
+                    transformed_data,
+                    exchange_rates,
+                    bulk_mode=bulk_mode,
+                    connection_pool=connection_pool,
+                    max_workers=load_workers
+                )
+            finally:
+                if connection_pool is not None:
+                    connection_pool.closeall()
+        else:
+            loader.load_data(transformed_data, exchange_rates, bulk_mode=bulk_mode)
         
         # Generate reports
         logger.info("Starting report generation phase")
         report_generator = ReportGenerator(
             conn, 
             db_config.get('type', 'sqlite'),
-            config.get('reports_dir', 'reports')
+            config.get('reports_dir', 'reports'),
+            config.get('report_formats', ('csv',)),
+            db_config
         )
         report_generator.generate_reports()
         